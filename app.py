@@ -5,72 +5,720 @@ import io
 import csv
 import zipfile
 import tempfile
-import glob
+import hashlib
 import logging
-from datetime import date
+import re
+import shutil
+from collections import deque
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from parsing import parse_create_tables
-from filling import DataGenerator
+from filling import ColumnMappingsGenerator, DataGenerator
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speed-up; fall back to the stdlib
+    orjson = None
 
 
 # ----------------------------------------------------------------
 # Custom Streamlit logger handler to capture log messages
 # ----------------------------------------------------------------
+LOG_BUFFER_SIZE = 500
+LOG_HANDLER_NAME = "streamlit_ui_handler"
+
+
 class StreamlitLogHandler(logging.Handler):
     """
     A custom handler that captures logs and stores them in Streamlit's session_state.
     Each log is annotated with its level (e.g. [INFO], [ERROR]) for clarity.
+    Only the most recent ``maxlen`` lines are kept.
     """
 
+    def __init__(self, maxlen: int = LOG_BUFFER_SIZE) -> None:
+        super().__init__()
+        self.name = LOG_HANDLER_NAME
+        self.maxlen = maxlen
+        self.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+
     def emit(self, record: logging.LogRecord) -> None:
-        if "log_messages" not in st.session_state:
-            st.session_state["log_messages"] = []
-        lvl = record.levelname.upper()
-        msg = record.getMessage()
-        if lvl == "INFO":
-            line = f"[INFO] {msg}"
-        elif lvl == "ERROR":
-            line = f"[ERROR] {msg}"
-        else:
-            line = f"[{lvl}] {msg}"
-        st.session_state["log_messages"].append(line)
+        # Deferred downloads run outside any script run, with no session to log to.
+        if get_script_run_ctx(suppress_warning=True) is None:
+            return
+        buffer = st.session_state.setdefault("log_messages", deque(maxlen=self.maxlen))
+        buffer.append(self.format(record))
 
 
 # ----------------------------------------------------------------
 # Attach our custom handler to the root logger so all modules are covered.
+# Streamlit re-executes this module on every rerun, creating a new
+# StreamlitLogHandler class each time, so match the handler by name.
 # ----------------------------------------------------------------
 root_logger = logging.getLogger()
-if not any(isinstance(h, StreamlitLogHandler) for h in root_logger.handlers):
+if not any(h.name == LOG_HANDLER_NAME for h in root_logger.handlers):
     root_logger.addHandler(StreamlitLogHandler())
 
 
+def _loads(text: str):
+    """
+    Parse a JSON document, using orjson when it is installed.
+
+    Parameters
+    ----------
+    text : str
+        JSON text, e.g. the content of one of the configuration text areas.
+
+    Returns
+    -------
+    Any
+        The decoded Python object.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _dumps(obj, pretty: bool = True) -> str:
+    """
+    Serialize an object to JSON text, using orjson when it is installed.
+
+    Values JSON has no type for (e.g. Decimal) are rendered with ``str``.
+
+    Parameters
+    ----------
+    obj : Any
+        Object to serialize.
+    pretty : bool, optional
+        Indent the output with two spaces (default is True).
+
+    Returns
+    -------
+    str
+        The JSON document as text, ready to be shown in a Streamlit widget.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+    return json.dumps(obj, default=str, indent=2 if pretty else None)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parse_cached(sql: str, dialect: str) -> dict:
+    """
+    Parse a CREATE TABLE script, caching the schema per (script, dialect) pair.
+
+    Streamlit reruns the whole script on every widget interaction, so an
+    identical script is only ever parsed once. The cache is shared by all
+    sessions, so only the last few distinct scripts are kept; the sql_hash
+    check in main() already skips re-parsing within a session.
+
+    Parameters
+    ----------
+    sql : str
+        The stripped SQL script.
+    dialect : str
+        SQL dialect understood by ``parse_create_tables``.
+
+    Returns
+    -------
+    dict
+        The parsed schema.
+    """
+    return parse_create_tables(sql, dialect=dialect)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parse_json(text: str):
+    """
+    Parse one of the configuration text areas, caching the result per text.
+
+    Only the last few distinct texts are kept; the three text areas plus a few
+    recent edits are all that is ever looked up again.
+
+    Parameters
+    ----------
+    text : str
+        JSON text entered by the user.
+
+    Returns
+    -------
+    Any
+        The decoded Python object.
+    """
+    return _loads(text)
+
+
+def parse_config_json(texts: dict) -> dict:
+    """
+    Decode and validate the JSON configuration text areas in one pass.
+
+    Parameters
+    ----------
+    texts : dict
+        Maps each DataGenerator keyword (e.g. ``"predefined_values"``) to the
+        JSON text entered for it.
+
+    Returns
+    -------
+    dict
+        Maps the same keywords to the decoded objects.
+
+    Raises
+    ------
+    ValueError
+        If a text is not valid JSON or does not decode to a JSON object; the
+        message names the offending configuration.
+    """
+    configs = {}
+    for name, text in texts.items():
+        try:
+            value = _parse_json(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON in `{name}`: {e}") from e
+        if not isinstance(value, dict):
+            raise ValueError(f"`{name}` must be a JSON object.")
+        configs[name] = value
+    return configs
+
+
+def _build_example_strings(tables_parsed: dict) -> tuple:
+    """
+    Build the default JSON shown in the three configuration text areas.
+
+    Called once per successful parse; the result is kept in session_state so
+    reruns caused by typing in any widget neither re-encode nor re-hash them.
+
+    Parameters
+    ----------
+    tables_parsed : dict
+        The parsed schema.
+
+    Returns
+    -------
+    tuple
+        ``(predefined_values, column_type_mappings, num_rows_per_table)`` as JSON text.
+    """
+    default_predef = _dumps({"global": {"sex": ["M", "F"]}})
+    default_colmap = _dumps({
+        "global": {
+            "first_name": "first_name",
+            "last_name": "last_name",
+            "email": "email"
+        }
+    })
+    default_numrows = _dumps({tbl: 10 for tbl in tables_parsed})
+    return default_predef, default_colmap, default_numrows
+
+
+def preview_inferred_mappings(tables_parsed: dict, threshold: float, num_preview: int = 5) -> dict:
+    """
+    Generate a few sample rows from the automatically inferred column mappings.
+
+    Only the mappings are inferred; unlike building a full DataGenerator there
+    is no table ordering, primary key setup, CHECK evaluator or foreign key
+    map, none of which a 5-row preview needs.
+
+    Parameters
+    ----------
+    tables_parsed : dict
+        The parsed schema.
+    threshold : float
+        Fuzzy matching threshold passed to ColumnMappingsGenerator.
+    num_preview : int, optional
+        Number of sample rows per table (default is 5).
+
+    Returns
+    -------
+    dict
+        ``{table_name: [row_dict, ...]}`` for every table with at least one
+        mapped column; empty when nothing matched.
+    """
+    mappings_generator = ColumnMappingsGenerator(threshold=threshold)
+    mappings = mappings_generator.generate(tables_parsed)
+
+    fake = mappings_generator.fake
+    preview = {}
+    for table_name, col_map in mappings.items():
+        if not col_map:
+            continue
+        rows = preview[table_name] = []
+        for _ in range(num_preview):
+            row_data = {}
+            for col_name, generator_fn in col_map.items():
+                if callable(generator_fn):
+                    row_data[col_name] = generator_fn(fake, row_data)
+                elif isinstance(generator_fn, str):
+                    row_data[col_name] = getattr(fake, generator_fn)()
+                else:
+                    row_data[col_name] = None
+            rows.append(row_data)
+    return preview
+
+
+ZIP_COPY_BUFFER_SIZE = 1024 * 1024
+
+
 def export_files_zip_in_memory(directory: str, pattern: str) -> bytes:
     """
     Zip all files from a given directory that match the pattern in memory.
 
+    Files are stored uncompressed: generated data compresses poorly, and
+    skipping deflate makes building the archive a plain copy. Each file is
+    streamed into the archive in 1 MB blocks rather than read whole, and
+    ZIP64 headers are only written for files that need them. The
+    directory is listed once with ``os.scandir``; only ``*.ext``-style patterns
+    are supported.
+
     Parameters
     ----------
     directory : str
         Directory containing exported files.
     pattern : str
-        Glob pattern (e.g. "*.json" or "*.csv").
+        Suffix pattern (e.g. "*.json" or "*.csv").
+
+    Returns
+    -------
+    bytes
+        The ZIP archive content in memory.
+    """
+    suffix = pattern.lstrip("*")
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_STORED) as zipf, os.scandir(directory) as entries:
+        for entry in entries:
+            if not (entry.name.endswith(suffix) and entry.is_file(follow_symlinks=False)):
+                continue
+            force_zip64 = entry.stat(follow_symlinks=False).st_size > zipfile.ZIP64_LIMIT
+            with open(entry.path, "rb") as src, zipf.open(entry.name, "w", force_zip64=force_zip64) as dst:
+                shutil.copyfileobj(src, dst, length=ZIP_COPY_BUFFER_SIZE)
+    return zip_buffer.getvalue()
+
+
+def export_data_as_csv_zip_in_memory(data: dict, tables_schema: dict) -> bytes:
+    """
+    Stream generated rows straight into an in-memory ZIP of per-table CSV files.
+
+    Rows are written one by one into each archive member, so no intermediate
+    CSV file or per-table text buffer is ever built.
+
+    Parameters
+    ----------
+    data : dict
+        Generated data, mapping table names to lists of row dictionaries.
+    tables_schema : dict
+        Parsed schema, used to fix the column order of each CSV file.
 
     Returns
     -------
     bytes
         The ZIP archive content in memory.
     """
+    col_index = {t: tuple(c["name"] for c in spec["columns"]) for t, spec in tables_schema.items()}
     zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for fpath in glob.glob(os.path.join(directory, pattern)):
-            zipf.write(fpath, arcname=os.path.basename(fpath))
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_STORED) as zipf:
+        for table_name, rows in data.items():
+            if not rows:
+                continue
+            columns = col_index[table_name]
+            with zipf.open(f"{table_name}.csv", "w", force_zip64=True) as raw, \
+                    io.TextIOWrapper(raw, encoding="utf-8", newline="") as text:
+                writer = csv.writer(text)
+                writer.writerow(columns)
+                # csv.writer writes None as an empty field, same as DictWriter's restval="".
+                writer.writerows(map(row.get, columns) for row in rows)
     return zip_buffer.getvalue()
 
 
+def _sql_literal(value) -> str:
+    """
+    Render a Python value as a SQL literal, matching DataGenerator's INSERT export.
+
+    Parameters
+    ----------
+    value : Any
+        Value taken from a generated row or from ``predefined_values``.
+
+    Returns
+    -------
+    str
+        The SQL literal.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, datetime):
+        return f"'{value.strftime('%Y-%m-%d %H:%M:%S')}'"
+    if isinstance(value, date):
+        return f"'{value.strftime('%Y-%m-%d')}'"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value)
+
+
+def _iter_rows_insert_sql(table_name: str, columns: list, rows: list,
+                          max_rows_per_insert: int = 1000) -> Iterator[str]:
+    """
+    Render already generated rows as multi-row INSERT statements, one batch at a time.
+
+    Parameters
+    ----------
+    table_name : str
+        Target table.
+    columns : list
+        Column names, in schema order.
+    rows : list
+        Row dictionaries for the table.
+    max_rows_per_insert : int, optional
+        Maximum number of rows per INSERT statement (default is 1000).
+
+    Yields
+    ------
+    str
+        One INSERT statement.
+    """
+    prefix = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES"
+    for i in range(0, len(rows), max_rows_per_insert):
+        values = ",\n".join(
+            "(" + ", ".join(_sql_literal(row.get(col)) for col in columns) + ")"
+            for row in rows[i: i + max_rows_per_insert]
+        )
+        yield f"{prefix}\n{values};"
+
+
+def iter_sql_insert_statements(data_generator: DataGenerator, max_rows_per_insert: int = 1000) -> Iterator[str]:
+    """
+    Export generated data as INSERT statements, yielded one batch at a time.
+
+    The statements are the same as those of
+    DataGenerator.export_as_sql_insert_query, but the script is never held as
+    one string.
+
+    Parameters
+    ----------
+    data_generator : DataGenerator
+        Generator holding the data produced in Step 3.
+    max_rows_per_insert : int, optional
+        Maximum number of rows per INSERT statement (default is 1000).
+
+    Yields
+    ------
+    str
+        One INSERT statement.
+    """
+    for table_name, rows in data_generator.generated_data.items():
+        if not rows:
+            continue
+        columns = [c["name"] for c in data_generator.tables[table_name]["columns"]]
+        yield from _iter_rows_insert_sql(table_name, columns, rows, max_rows_per_insert)
+
+
+def _lookup_config(config: dict, table_name: str, col_name: str):
+    """Return the table-specific or global entry for a column, like DataGenerator does."""
+    if col_name in config.get(table_name, {}):
+        return config[table_name][col_name]
+    return config.get("global", {}).get(col_name)
+
+
+_SERIAL_BASE_TYPES = {"SMALLSERIAL": "SMALLINT", "SERIAL": "INTEGER", "BIGSERIAL": "BIGINT"}
+
+
+def _is_integer_column(column: dict) -> bool:
+    """Return True for serial or integer-typed columns, whose generated values are 1..N when used as keys."""
+    return bool(column.get("is_serial")) or bool(re.search(r"\b(SMALLINT|INT|INTEGER|BIGINT)\b", column["type"].upper()))
+
+
+def _generate_series_expr(data_generator: DataGenerator, table_name: str, column: dict) -> str | None:
+    """
+    Build a PostgreSQL expression that produces one value of ``column`` per series row ``g``.
+
+    Parameters
+    ----------
+    data_generator : DataGenerator
+        Generator holding the schema, configuration and generated row counts.
+    table_name : str
+        Table the column belongs to.
+    column : dict
+        Parsed column definition.
+
+    Returns
+    -------
+    str or None
+        The SQL expression, or None when the column cannot be generated
+        server-side (e.g. it is mapped to a Faker provider).
+    """
+    table = data_generator.tables[table_name]
+    col_name = column["name"]
+    col_type = column["type"].upper()
+    is_primary_key = table.get("primary_key") == [col_name]
+    unique = (is_primary_key or [col_name] in table.get("unique_constraints", [])
+              or "UNIQUE" in column.get("constraints", []))
+
+    for fk in table.get("foreign_keys", []):
+        if col_name in fk["columns"]:
+            # Random parent ids can repeat, so unique (including primary key) FK columns use the rows.
+            if unique or fk["columns"] != [col_name]:
+                return None
+            parent = data_generator.tables.get(fk["ref_table"], {})
+            parent_rows = len(data_generator.generated_data.get(fk["ref_table"], []))
+            if parent.get("primary_key") != fk["ref_columns"] or not parent_rows:
+                return None
+            parent_key = next((c for c in parent["columns"] if c["name"] == fk["ref_columns"][0]), None)
+            # Only integer primary keys are generated as 1..N.
+            if parent_key is None or not _is_integer_column(parent_key):
+                return None
+            return f"1 + floor(random() * {parent_rows})::int"
+
+    # Children referencing this column are exported from the generated rows, so its
+    # values must be too, except an integer primary key, whose generated rows are 1..N.
+    referenced = any(fk["ref_table"] == table_name and col_name in fk["ref_columns"]
+                     for other in data_generator.tables.values() for fk in other.get("foreign_keys", []))
+    if referenced and not (is_primary_key and _is_integer_column(column)):
+        return None
+
+    if is_primary_key:
+        return "g" if _is_integer_column(column) else None
+
+    predefined = _lookup_config(data_generator.predefined_values, table_name, col_name)
+    if predefined is not None:
+        # Sampling from the list repeats values, which a UNIQUE column cannot hold.
+        if unique:
+            return None
+        # Literals in a SELECT list resolve to text, so cast them to the column type
+        # as an INSERT ... VALUES would.
+        cast_type = _SERIAL_BASE_TYPES.get(col_type, column["type"])
+        if not isinstance(predefined, list):
+            return f"{_sql_literal(predefined)}::{cast_type}"
+        array = ", ".join(_sql_literal(v) for v in predefined)
+        return f"(ARRAY[{array}])[1 + floor(random() * {len(predefined)})::int]::{cast_type}"
+    if _lookup_config(data_generator.column_type_mappings, table_name, col_name) is not None:
+        return None
+
+    if re.search(r"\b(SMALLINT|INT|INTEGER|BIGINT)\b", col_type):
+        return "g" if unique else "floor(random() * 20001)::int - 10000"
+    if unique:
+        length_match = re.search(r"\((\d+)\)", col_type)
+        length = int(length_match.group(1)) if length_match else 255
+        row_count = len(data_generator.generated_data[table_name])
+        if re.search(r"\b(CHAR|VARCHAR|CHARACTER VARYING|TEXT)\b", col_type) and length > len(str(row_count)):
+            # The "<g>_" prefix keeps values distinct however they are truncated.
+            return f"left(g::text || '_' || md5(random()::text), {length})"
+        return None
+    if re.search(r"\b(DECIMAL|NUMERIC)\b", col_type):
+        precision, scale = 10, 2
+        match = re.search(r"\((\d+),\s*(\d+)\)", col_type)
+        if match:
+            precision, scale = int(match.group(1)), int(match.group(2))
+        return f"trunc((random() * {10 ** (precision - scale) - 1})::numeric, {scale})"
+    if re.search(r"\b(FLOAT|REAL|DOUBLE)\b", col_type):
+        return "random() * 10000"
+    if re.search(r"\b(TIMESTAMP|DATETIME)\b", col_type):
+        return "TIMESTAMP '1970-01-01' + random() * (now()::timestamp - TIMESTAMP '1970-01-01')"
+    if re.search(r"\bDATE\b", col_type):
+        return "DATE '1970-01-01' + floor(random() * (CURRENT_DATE - DATE '1970-01-01'))::int"
+    if re.search(r"\bBOOL(EAN)?\b", col_type):
+        return "random() < 0.5"
+    if re.search(r"\b(CHAR|VARCHAR|CHARACTER VARYING|TEXT)\b", col_type):
+        length_match = re.search(r"\((\d+)\)", col_type)
+        return f"left(md5(random()::text), {int(length_match.group(1))})" if length_match else "md5(random()::text)"
+    return None
+
+
+def iter_generate_series_sql(data_generator: DataGenerator, max_rows_per_insert: int = 1000) -> Iterator[str]:
+    """
+    Export generated data as PostgreSQL ``INSERT ... SELECT ... FROM generate_series`` statements.
+
+    Each table whose columns can all be produced server-side (random numbers,
+    dates, strings and ``predefined_values`` choices) becomes a single
+    statement, so the database materializes the rows instead of parsing one
+    VALUES tuple per row. Tables with CHECK constraints, composite primary key
+    or UNIQUE constraints, or columns mapped to Faker providers fall back to
+    the rows already generated in Python.
+
+    Parameters
+    ----------
+    data_generator : DataGenerator
+        Generator holding the data produced in Step 3.
+    max_rows_per_insert : int, optional
+        Maximum number of rows per INSERT statement for tables that fall back
+        to generated rows (default is 1000).
+
+    Yields
+    ------
+    str
+        One SQL statement.
+    """
+    for table_name, rows in data_generator.generated_data.items():
+        if not rows:
+            continue
+        table = data_generator.tables[table_name]
+        columns = [c["name"] for c in table["columns"]]
+        exprs = None
+        composite_unique = (len(table.get("primary_key") or []) > 1
+                            or any(len(u) > 1 for u in table.get("unique_constraints", [])))
+        if not table.get("check_constraints") and not composite_unique:
+            exprs = [_generate_series_expr(data_generator, table_name, c) for c in table["columns"]]
+        if exprs is None or None in exprs:
+            yield from _iter_rows_insert_sql(table_name, columns, rows, max_rows_per_insert)
+            continue
+        yield (
+            f"INSERT INTO {table_name} ({', '.join(columns)})\n"
+            f"SELECT {', '.join(exprs)}\n"
+            f"FROM generate_series(1, {len(rows)}) AS g;"
+        )
+
+
+def export_sql_in_memory(statements: Iterable[str]) -> bytes:
+    """
+    Write SQL statements, separated by blank lines, into a UTF-8 encoded script.
+
+    Statements are encoded and spooled one at a time, so the full script is
+    never built as a Python string; scripts above 16 MB spill to a temporary
+    file until they are read back for the download.
+
+    Parameters
+    ----------
+    statements : Iterable[str]
+        SQL statements, e.g. from iter_sql_insert_statements.
+
+    Returns
+    -------
+    bytes
+        The SQL script.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as spool:
+        for i, statement in enumerate(statements):
+            if i:
+                spool.write(b"\n\n")
+            spool.write(statement.encode("utf-8"))
+        spool.seek(0)
+        return spool.read()
+
+
+def export_json_zip_in_memory(data_generator: DataGenerator) -> bytes:
+    """
+    Export per-table JSON files with DataGenerator and zip them in memory.
+
+    The files are written to a temporary directory that is removed once the
+    archive is built.
+
+    Parameters
+    ----------
+    data_generator : DataGenerator
+        Generator holding the data produced in Step 3.
+
+    Returns
+    -------
+    bytes
+        The ZIP archive content in memory.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_generator.export_data_files(tmpdir, file_type="JSON")
+        return export_files_zip_in_memory(tmpdir, "*.json")
+
+
+def deferred_export(cache: dict, name: str, settings: tuple, build: Callable[..., bytes],
+                    *args) -> Callable[[], bytes]:
+    """
+    Wrap an export builder as the ``data`` callable of a download button.
+
+    Streamlit calls it only when the button is clicked, on a thread without a
+    script run context, so the result is kept in ``cache`` (a plain dict held
+    in session state) instead of in st.session_state itself. Downloading the
+    same format again with the same settings reuses the bytes.
+
+    Parameters
+    ----------
+    cache : dict
+        Per-dataset cache of ``{name: (settings, bytes)}``.
+    name : str
+        Export format, used as the cache key.
+    settings : tuple
+        Export settings the result depends on; a change rebuilds the export.
+    build : Callable[..., bytes]
+        Function building the export.
+    *args
+        Arguments passed to ``build``.
+
+    Returns
+    -------
+    Callable[[], bytes]
+        A zero-argument callable returning the export.
+    """
+    def _export() -> bytes:
+        entry = cache.get(name)
+        if entry is None or entry[0] != settings:
+            entry = cache[name] = (settings, build(*args))
+        return entry[1]
+
+    return _export
+
+
+@st.fragment
+def downloads_panel(dg_export: DataGenerator, dialect: str) -> None:
+    """
+    Render Step 4: export options and the three download buttons.
+
+    Runs as a fragment, so changing the export options reruns only this panel
+    rather than the whole page. The download buttons don't trigger a rerun at all.
+
+    Parameters
+    ----------
+    dg_export : DataGenerator
+        Generator holding the data produced in Step 3.
+    dialect : str
+        The dialect the schema was parsed with; the generate_series mode is offered for postgres only.
+    """
+    generate_series = False
+    if dialect == "postgres":
+        export_mode = st.radio(
+            "SQL export mode",
+            options=["row INSERTs", "generate_series (postgres only)"],
+            help="generate_series emits one INSERT ... SELECT per table and lets PostgreSQL build the rows; "
+                 "tables with CHECK constraints or Faker-mapped columns still use the generated rows."
+        )
+        generate_series = export_mode.startswith("generate_series")
+    batch_size = st.number_input("INSERT batch size (rows per statement)", min_value=1, max_value=10000,
+                                 value=1000)
+
+    # Each export is built only when its button is clicked, then reused for the same dataset and settings.
+    cache = st.session_state["export_cache"]
+    iter_sql = iter_generate_series_sql if generate_series else iter_sql_insert_statements
+
+    # SQL Export
+    st.download_button(
+        label="Download SQL Insert Queries",
+        data=deferred_export(cache, "sql", (generate_series, batch_size),
+                             lambda: export_sql_in_memory(iter_sql(dg_export, batch_size))),
+        file_name="fake_data.sql",
+        mime="text/plain",
+        on_click="ignore"
+    )
+
+    # JSON Export -> ZIP
+    st.download_button(
+        label="Download Data (JSON ZIP)",
+        data=deferred_export(cache, "json", (), export_json_zip_in_memory, dg_export),
+        file_name="fake_data_json.zip",
+        mime="application/zip",
+        on_click="ignore"
+    )
+
+    # CSV Export -> ZIP (streamed from memory, no temporary files)
+    st.download_button(
+        label="Download Data (CSV ZIP)",
+        data=deferred_export(cache, "csv", (), export_data_as_csv_zip_in_memory,
+                             dg_export.generated_data, dg_export.tables),
+        file_name="fake_data_csv.zip",
+        mime="application/zip",
+        on_click="ignore"
+    )
+
+
 def main():
     st.title("Data Filler Web UI")
 
     # Clear log messages at the start of each session/parse.
-    st.session_state["log_messages"] = []
+    st.session_state["log_messages"] = deque(maxlen=LOG_BUFFER_SIZE)
 
     # ----------------------------------------------------------------
     # Step 1: SQL Script & Dialect Selection
@@ -90,20 +738,44 @@ def main():
         st.session_state["tables_parsed"] = None
     if "data_generator" not in st.session_state:
         st.session_state["data_generator"] = None
+    if "export_cache" not in st.session_state:
+        st.session_state["export_cache"] = {}
+    if "preview_json" not in st.session_state:
+        st.session_state["preview_json"] = None
+    if "example_strings" not in st.session_state:
+        st.session_state["example_strings"] = None
+    if "schema_json" not in st.session_state:
+        st.session_state["schema_json"] = None
 
     sql_script = st.text_area("SQL Script", "-- Paste your CREATE TABLE script here", height=250)
 
     if st.button("Parse SQL"):
-        st.session_state["log_messages"] = []  # Clear logs on new action
+        st.session_state["log_messages"] = deque(maxlen=LOG_BUFFER_SIZE)  # Clear logs on new action
         try:
-            tables_parsed = parse_create_tables(sql_script.strip(), dialect=dialect)
-            st.session_state["tables_parsed"] = tables_parsed
+            sql = sql_script.strip()
+            # Only re-parse (and rebuild the derived strings) when script or dialect changed.
+            sql_hash = hashlib.blake2b(f"{dialect}\0{sql}".encode(), digest_size=8).digest()
+            if st.session_state.get("sql_hash") != sql_hash or st.session_state["tables_parsed"] is None:
+                tables_parsed = _parse_cached(sql, dialect)
+                st.session_state["tables_parsed"] = tables_parsed
+                st.session_state["example_strings"] = _build_example_strings(tables_parsed)
+                st.session_state["schema_json"] = _dumps(tables_parsed, pretty=False)
+                st.session_state["sql_hash"] = sql_hash
+                st.session_state["parsed_dialect"] = dialect
             st.session_state["data_generator"] = None  # Clear previous instance
+            st.session_state["export_cache"] = {}
+            st.session_state["preview_json"] = None
             st.success("SQL script parsed successfully!")
             root_logger.info("SQL script parsed successfully using dialect '%s'.", dialect)
         except Exception as e:
             st.session_state["tables_parsed"] = None
+            st.session_state["sql_hash"] = None
+            st.session_state["parsed_dialect"] = None
+            st.session_state["example_strings"] = None
+            st.session_state["schema_json"] = None
             st.session_state["data_generator"] = None
+            st.session_state["export_cache"] = {}
+            st.session_state["preview_json"] = None
             st.error(f"Error parsing SQL: {e}")
             root_logger.error("Error parsing SQL: %s", e)
 
@@ -114,28 +786,22 @@ def main():
         schema = st.session_state["tables_parsed"]
 
         with st.expander("Show Parsed Tables"):
-            st.json(schema)
+            # Serialized once per parse; st.json passes strings through untouched.
+            st.json(st.session_state["schema_json"])
 
         st.markdown("---")
         st.markdown("## Step 2: Configuration")
 
+        default_predef, default_colmap, default_numrows = st.session_state["example_strings"]
+
         st.subheader("`predefined_values` (JSON)")
-        default_predef = json.dumps({"global": {"sex": ["M", "F"]}}, indent=2)
         predefined_values_str = st.text_area("Enter `predefined_values` as JSON", value=default_predef, height=200)
 
         st.subheader("`column_type_mappings` (JSON)")
-        default_colmap = json.dumps({
-            "global": {
-                "first_name": "first_name",
-                "last_name": "last_name",
-                "email": "email"
-            }
-        }, indent=2)
         column_type_mappings_str = st.text_area("Enter `column_type_mappings` as JSON", value=default_colmap,
                                                 height=200)
 
         st.subheader("`num_rows_per_table` (JSON)")
-        default_numrows = json.dumps({tbl: 10 for tbl in schema}, indent=2)
         num_rows_per_table_str = st.text_area("Enter `num_rows_per_table` as JSON", value=default_numrows, height=150)
 
         st.subheader("Global Number of Rows (Fallback)")
@@ -149,19 +815,13 @@ def main():
 
         if guess_mapping and st.button("Preview Inferred Mappings"):
             try:
-                from contextlib import redirect_stdout
-                dg_preview = DataGenerator(
-                    tables=schema,
-                    num_rows=5,
-                    guess_column_type_mappings=True,
-                    threshold_for_guessing=threshold_for_guessing
-                )
-                buf = io.StringIO()
-                with redirect_stdout(buf):
-                    dg_preview.preview_inferred_mappings(num_preview=5)
-                preview_output = buf.getvalue()
+                preview_rows = preview_inferred_mappings(schema, threshold_for_guessing, num_preview=5)
                 st.markdown("**Inferred Mappings Preview:**")
-                st.text(preview_output)
+                if not preview_rows:
+                    st.info("No column_type_mappings found. No columns matched the fuzzy matching threshold.")
+                for table_name, rows in preview_rows.items():
+                    st.markdown(f"**{table_name}**")
+                    st.table(rows)
                 root_logger.info("Auto-inferred column mapping preview complete.")
             except Exception as e:
                 st.error(f"Error previewing mappings: {e}")
@@ -175,76 +835,48 @@ def main():
         if st.button("Generate Data"):
             try:
                 root_logger.info("Reading JSON configuration for data generation...")
-                predefined_values = json.loads(predefined_values_str)
-                column_type_mappings = json.loads(column_type_mappings_str)
-                num_rows_per_table = json.loads(num_rows_per_table_str)
-                print(guess_mapping)
+                configs = parse_config_json({
+                    "predefined_values": predefined_values_str,
+                    "column_type_mappings": column_type_mappings_str,
+                    "num_rows_per_table": num_rows_per_table_str,
+                })
                 dg = DataGenerator(
                     tables=schema,
                     num_rows=global_num_rows,
-                    predefined_values=predefined_values,
-                    column_type_mappings=column_type_mappings,
-                    num_rows_per_table=num_rows_per_table,
+                    **configs,
                     guess_column_type_mappings=guess_mapping,
                     threshold_for_guessing=threshold_for_guessing
                 )
 
-                generated_data = dg.generate_data()
+                dg.generate_data()
                 st.session_state["data_generator"] = dg  # Store the instance for export
+                st.session_state["export_cache"] = {}
+                # Serialize the preview once; reruns render the stored string.
+                st.session_state["preview_json"] = _dumps(
+                    {tbl: rows[:5] for tbl, rows in dg.generated_data.items()}, pretty=False
+                )
                 st.success("Data generated successfully!")
                 root_logger.info("Data generation complete.")
 
-                st.markdown("### Data Preview (first 5 rows per table)")
-                preview_data = {tbl: rows[:5] for tbl, rows in generated_data.items()}
-                st.json(preview_data)
-
             except Exception as e:
                 st.session_state["data_generator"] = None
+                st.session_state["export_cache"] = {}
+                st.session_state["preview_json"] = None
                 st.error(f"Error generating data: {e}")
                 root_logger.error("Error generating data: %s", e)
 
+        if st.session_state["preview_json"] is not None:
+            st.markdown("### Data Preview (first 5 rows per table)")
+            st.json(st.session_state["preview_json"])
+
     # ----------------------------------------------------------------
     # Step 4: Export & Download Data (only if data is generated)
     # ----------------------------------------------------------------
     if st.session_state.get("data_generator") is not None:
         st.markdown("---")
         st.markdown("## Step 4: Export & Download Data")
-        dg_export = st.session_state["data_generator"]
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # SQL Export
-            dg_export.export_data_files(tmpdir, file_type="SQL")
-            sql_path = os.path.join(tmpdir, "data_inserts.sql")
-            if os.path.exists(sql_path):
-                with open(sql_path, "r", encoding="utf-8") as f:
-                    sql_content = f.read()
-                st.download_button(
-                    label="Download SQL Insert Queries",
-                    data=sql_content,
-                    file_name="fake_data.sql",
-                    mime="text/plain"
-                )
-
-            # JSON Export -> ZIP
-            dg_export.export_data_files(tmpdir, file_type="JSON")
-            json_zip_bytes = export_files_zip_in_memory(tmpdir, "*.json")
-            st.download_button(
-                label="Download Data (JSON ZIP)",
-                data=json_zip_bytes,
-                file_name="fake_data_json.zip",
-                mime="application/zip"
-            )
-
-            # CSV Export -> ZIP
-            dg_export.export_data_files(tmpdir, file_type="CSV")
-            csv_zip_bytes = export_files_zip_in_memory(tmpdir, "*.csv")
-            st.download_button(
-                label="Download Data (CSV ZIP)",
-                data=csv_zip_bytes,
-                file_name="fake_data_csv.zip",
-                mime="application/zip"
-            )
-            root_logger.info("Data export complete. Temporary files cleaned up.")
+        # Offer export modes for the dialect the schema was parsed with, not the live selectbox.
+        downloads_panel(st.session_state["data_generator"], st.session_state["parsed_dialect"])
 
     # ----------------------------------------------------------------
     # Step 5: Log Output in an expander
@@ -252,7 +884,9 @@ def main():
     st.markdown("---")
     with st.expander("View Log Output"):
         if "log_messages" in st.session_state and st.session_state["log_messages"]:
-            st.text_area("Logs (most recent last)", "\n".join(st.session_state["log_messages"]), height=200)
+            # The buffer keeps only the last LOG_BUFFER_SIZE lines; st.code is a
+            # read-only block, so no editable widget state is sent with each rerun.
+            st.code("\n".join(st.session_state["log_messages"]), language=None, height=200)
         else:
             st.write("No logs available.")
 
@@ -1,7 +1,15 @@
+import hashlib
+import re
+from graphlib import TopologicalSorter
+
+from parsing import parse_create_tables
+
 sql_script = \
     """
+BEGIN;
+
 CREATE TABLE Authors (
-    author_id SERIAL PRIMARY KEY,
+    author_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     sex CHAR(1) NOT NULL,
     first_name VARCHAR(50) NOT NULL,
     last_name VARCHAR(50) NOT NULL,
@@ -11,18 +19,18 @@ CREATE TABLE Authors (
 );
 
 CREATE TABLE Categories (
-    category_id SERIAL PRIMARY KEY,
+    category_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     category_name VARCHAR(50) NOT NULL UNIQUE
 );
 
 CREATE TABLE Books (
-    book_id SERIAL PRIMARY KEY,
+    book_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     title VARCHAR(100) NOT NULL,
     isbn VARCHAR(13) NOT NULL UNIQUE,
-    author_id INT NOT NULL,
+    author_id BIGINT NOT NULL,
     publication_year INT NOT NULL,
-    category_id INT NOT NULL,
-    penalty_rate DECIMAL(5,2) NOT NULL,
+    category_id BIGINT NOT NULL,
+    penalty_rate SMALLINT NOT NULL,
 
     CONSTRAINT fk_books_author
         FOREIGN KEY(author_id)
@@ -33,28 +41,31 @@ CREATE TABLE Books (
         REFERENCES Categories(category_id),
 
     CONSTRAINT chk_isbn_format
-        CHECK (isbn ~ '^\\d{13}$'),
+        CHECK (isbn ~ '^[0-9]{13}$'),
 
     CONSTRAINT chk_publication_year
-        CHECK (publication_year >= 1900 AND publication_year <= EXTRACT(YEAR FROM CURRENT_DATE))
+        CHECK (publication_year >= 1900 AND publication_year <= 2100),
+
+    CONSTRAINT chk_penalty_rate
+        CHECK (penalty_rate >= 0 AND penalty_rate <= 9999)
 );
 
 CREATE TABLE Members (
-    member_id SERIAL PRIMARY KEY,
+    member_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     first_name VARCHAR(50) NOT NULL,
     last_name VARCHAR(50) NOT NULL,
     email VARCHAR(100) NOT NULL UNIQUE,
     registration_date DATE NOT NULL,
 
     CONSTRAINT chk_email_format
-        CHECK (email ~ '^[\\w\\.-]+@[\\w\\.-]+\\.\\w{2,}$')
+        CHECK (email ~ '^[A-Za-z0-9._-]{1,64}@[A-Za-z0-9.-]{1,255}\\.[A-Za-z]{2,24}$')
 );
 
 CREATE TABLE Loans (
-    loan_id SERIAL PRIMARY KEY,
-    book_id INT NOT NULL,
-    member_id INT NOT NULL,
-    loan_date DATE NOT NULL,
+    loan_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    book_id BIGINT NOT NULL,
+    member_id BIGINT NOT NULL,
+    loan_date DATE NOT NULL DEFAULT CURRENT_DATE,
     due_date DATE NOT NULL,
     return_date DATE,
 
@@ -74,9 +85,9 @@ CREATE TABLE Loans (
 );
 
 CREATE TABLE Penalties (
-    penalty_id SERIAL PRIMARY KEY,
-    loan_id INT NOT NULL,
-    penalty_amount DECIMAL(10,2) NOT NULL,
+    penalty_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    loan_id BIGINT NOT NULL,
+    penalty_amount_cents INTEGER NOT NULL,
     penalty_date DATE NOT NULL,
 
     CONSTRAINT fk_penalties_loan
@@ -84,6 +95,55 @@ CREATE TABLE Penalties (
         REFERENCES Loans(loan_id),
 
     CONSTRAINT chk_penalty_amount
-        CHECK (penalty_amount > 0)
+        CHECK (penalty_amount_cents > 0)
 );
-"""
\ No newline at end of file
+
+CREATE VIEW Penalties_v AS
+SELECT penalty_id, loan_id, penalty_amount_cents / 100.0 AS penalty_amount, penalty_date
+FROM Penalties;
+
+COMMIT;
+"""
+
+# Foreign key columns are not indexed automatically by PostgreSQL. Kept out of
+# sql_script so the indexes can be built once, after the generated data is loaded.
+CREATE_INDEXES_SQL = """
+CREATE INDEX idx_books_author ON Books(author_id);
+CREATE INDEX idx_books_category ON Books(category_id);
+CREATE INDEX idx_loans_book ON Loans(book_id);
+CREATE INDEX idx_loans_member ON Loans(member_id);
+CREATE INDEX idx_penalties_loan ON Penalties(loan_id);
+
+-- Partial indexes over open loans only (return_date IS NULL), for overdue-loan lookups.
+CREATE INDEX idx_loans_open ON Loans(due_date) WHERE return_date IS NULL;
+CREATE INDEX idx_loans_overdue ON Loans(member_id, due_date) WHERE return_date IS NULL;
+"""
+
+# Python equivalents of the chk_isbn_format and chk_email_format CHECK regexes,
+# compiled once for validating generated values. They end in \Z rather than $,
+# which in Python also matches before a trailing newline that PostgreSQL rejects.
+ISBN_PATTERN = re.compile(r'^[0-9]{13}\Z')
+EMAIL_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}@[A-Za-z0-9.-]{1,255}\.[A-Za-z]{2,24}\Z')
+
+# Changes whenever sql_script does; use it to key anything derived from the schema.
+SCHEMA_FINGERPRINT = hashlib.blake2b(sql_script.encode(), digest_size=16).hexdigest()
+
+# Parsed once at import; use this instead of calling parse_create_tables(sql_script) again.
+TABLES = parse_create_tables(sql_script)
+
+# Tables ordered so that each one comes after the tables its foreign keys reference.
+LOAD_ORDER = tuple(TopologicalSorter(
+    {name: {fk["ref_table"] for fk in spec["foreign_keys"]} for name, spec in TABLES.items()}
+).static_order())
+
+# Column lists for COPY <table> (<columns>) FROM STDIN, in the same order as the
+# web UI's CSV export, whose files can be loaded with FORMAT csv, HEADER.
+COPY_COLUMNS = {name: tuple(col["name"] for col in spec["columns"]) for name, spec in TABLES.items()}
+
+# One parameterized INSERT per table, with PostgreSQL's native $n placeholders, so
+# a loader can prepare each statement once per connection and reuse it for every row.
+INSERT_STMTS = {
+    name: f"INSERT INTO {name} ({', '.join(columns)}) "
+          f"VALUES ({', '.join(f'${i}' for i in range(1, len(columns) + 1))})"
+    for name, columns in COPY_COLUMNS.items()
+}
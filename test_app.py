@@ -0,0 +1,155 @@
+import pytest
+
+from parsing import parse_create_tables
+from filling import DataGenerator
+
+from app import _generate_series_expr, iter_generate_series_sql, iter_sql_insert_statements
+
+
+def _generate(sql: str, num_rows: int = 20, **kwargs) -> DataGenerator:
+    data_generator = DataGenerator(tables=parse_create_tables(sql), num_rows=num_rows, **kwargs)
+    data_generator.generate_data()
+    return data_generator
+
+
+def _expr(data_generator: DataGenerator, table_name: str, col_name: str):
+    column = next(c for c in data_generator.tables[table_name]["columns"] if c["name"] == col_name)
+    return _generate_series_expr(data_generator, table_name, column)
+
+
+def _statements(data_generator: DataGenerator) -> dict:
+    """Map each table name to the statements exported for it in generate_series mode."""
+    statements = {}
+    for statement in iter_generate_series_sql(data_generator):
+        table_name = statement.split()[2]
+        statements.setdefault(table_name, []).append(statement)
+    return statements
+
+
+def test_integer_primary_key_and_foreign_key_use_generate_series():
+    dg = _generate("""
+        CREATE TABLE A (a_id SERIAL PRIMARY KEY, n INT NOT NULL);
+        CREATE TABLE B (b_id SERIAL PRIMARY KEY, a_id INT NOT NULL, FOREIGN KEY (a_id) REFERENCES A(a_id));
+    """, num_rows=10)
+
+    assert _expr(dg, "A", "a_id") == "g"
+    assert _expr(dg, "B", "a_id") == "1 + floor(random() * 10)::int"
+    statements = _statements(dg)
+    assert statements["B"] == [
+        "INSERT INTO B (b_id, a_id)\nSELECT g, 1 + floor(random() * 10)::int\nFROM generate_series(1, 10) AS g;"
+    ]
+
+
+def test_unique_column_with_predefined_values_falls_back_to_rows():
+    tags = [f"tag{i}" for i in range(30)]
+    dg = _generate("CREATE TABLE T (id SERIAL PRIMARY KEY, tag VARCHAR(10) UNIQUE);",
+                   predefined_values={"T": {"tag": tags}})
+
+    assert _expr(dg, "T", "tag") is None
+    statements = _statements(dg)["T"]
+    assert all("generate_series" not in s for s in statements)
+    assert len({row["tag"] for row in dg.generated_data["T"]}) == 20
+
+
+def test_non_unique_column_with_predefined_values_samples_the_list():
+    dg = _generate("CREATE TABLE T (id SERIAL PRIMARY KEY, tag VARCHAR(10));",
+                   predefined_values={"T": {"tag": ["x", "y"]}})
+
+    assert _expr(dg, "T", "tag") == "(ARRAY['x', 'y'])[1 + floor(random() * 2)::int]::VARCHAR(10)"
+
+
+def test_predefined_values_are_cast_to_the_column_type():
+    dg = _generate("CREATE TABLE E (id SERIAL PRIMARY KEY, d DATE, n INT);",
+                   predefined_values={"E": {"d": ["2024-01-01", "2024-06-30"], "n": 7}})
+
+    assert _expr(dg, "E", "d") == "(ARRAY['2024-01-01', '2024-06-30'])[1 + floor(random() * 2)::int]::DATE"
+    assert _expr(dg, "E", "n") == "7::INT"
+
+
+def test_foreign_key_to_non_integer_primary_key_falls_back_to_rows():
+    dg = _generate("""
+        CREATE TABLE C (code VARCHAR(10) PRIMARY KEY);
+        CREATE TABLE D (d_id SERIAL PRIMARY KEY, code VARCHAR(10), FOREIGN KEY (code) REFERENCES C(code));
+    """)
+
+    assert _expr(dg, "C", "code") is None
+    assert _expr(dg, "D", "code") is None
+    assert all("generate_series" not in s for s in _statements(dg)["D"])
+
+
+def test_column_referenced_by_a_foreign_key_falls_back_to_rows():
+    dg = _generate("""
+        CREATE TABLE P (id SERIAL PRIMARY KEY, code VARCHAR(10) UNIQUE);
+        CREATE TABLE C (c_id SERIAL PRIMARY KEY, code VARCHAR(10), FOREIGN KEY (code) REFERENCES P(code));
+    """)
+
+    assert _expr(dg, "P", "code") is None
+    statements = _statements(dg)
+    assert all("generate_series" not in s for s in statements["P"])
+    assert all("generate_series" not in s for s in statements["C"])
+
+
+def test_unique_foreign_key_falls_back_to_rows():
+    # Only the schema is consulted here; generating a one-to-one foreign key can stall
+    # DataGenerator's unique-value retries, so no data is generated.
+    dg = DataGenerator(tables=parse_create_tables("""
+        CREATE TABLE Users (user_id SERIAL PRIMARY KEY);
+        CREATE TABLE Profiles (
+            profile_id SERIAL PRIMARY KEY,
+            user_id INT UNIQUE,
+            FOREIGN KEY (user_id) REFERENCES Users(user_id)
+        );
+    """), num_rows=20)
+
+    assert _expr(dg, "Profiles", "user_id") is None
+
+
+def test_primary_key_that_is_also_a_foreign_key_falls_back_to_rows():
+    dg = _generate("""
+        CREATE TABLE P (p_id SERIAL PRIMARY KEY);
+        CREATE TABLE E (p_id INT PRIMARY KEY, note VARCHAR(20), FOREIGN KEY (p_id) REFERENCES P(p_id));
+    """)
+
+    assert _expr(dg, "E", "p_id") is None
+    assert all("generate_series" not in s for s in _statements(dg)["E"])
+
+
+def test_composite_primary_key_falls_back_to_rows():
+    dg = _generate("""
+        CREATE TABLE A (a_id SERIAL PRIMARY KEY);
+        CREATE TABLE B (b_id SERIAL PRIMARY KEY);
+        CREATE TABLE AB (
+            a_id INT NOT NULL,
+            b_id INT NOT NULL,
+            PRIMARY KEY (a_id, b_id),
+            FOREIGN KEY (a_id) REFERENCES A(a_id),
+            FOREIGN KEY (b_id) REFERENCES B(b_id)
+        );
+    """)
+
+    statements = _statements(dg)
+    assert all("generate_series" not in s for s in statements["AB"])
+    assert "generate_series" in statements["A"][0]
+
+
+def test_check_constraint_falls_back_to_rows():
+    dg = _generate("""
+        CREATE TABLE Items (
+            item_id SERIAL PRIMARY KEY,
+            price INT NOT NULL,
+            CONSTRAINT chk_price CHECK (price > 0)
+        );
+    """)
+
+    assert all("generate_series" not in s for s in _statements(dg)["Items"])
+
+
+@pytest.mark.parametrize("max_rows_per_insert", [1, 7, 1000])
+def test_insert_statements_match_dependency_export(max_rows_per_insert):
+    from config import TABLES
+
+    dg = DataGenerator(tables=TABLES, num_rows=20)
+    dg.generate_data()
+
+    exported = "\n\n".join(iter_sql_insert_statements(dg, max_rows_per_insert))
+    assert exported == dg.export_as_sql_insert_query(max_rows_per_insert=max_rows_per_insert)